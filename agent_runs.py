@@ -0,0 +1,59 @@
+"""
+Run an agent on a thread and wait for the run to finish.
+
+The run's events are streamed over SSE, so control returns as soon as its status changes instead
+of polling for it. If the stream closes early (dropped connection or an error event), the run
+is looked up and polled with backoff until it reaches a terminal status.
+"""
+
+import random
+import time
+
+from azure.ai.agents.models import AgentStreamEvent, ListSortOrder, ThreadRun
+
+TERMINAL_RUN_STATUSES = {"completed", "failed", "cancelled", "expired", "incomplete"}
+_PENDING_RUN_STATUSES = {"queued", "in_progress", "cancelling"}
+
+
+def stream_run(
+    agents_client, thread_id: str, agent_id: str, initial_delay: float = 0.2, max_delay: float = 2.0
+) -> ThreadRun:
+    """
+    Create a run of the agent on the thread and wait for it to reach a terminal status.
+
+    :param agents_client (AgentsClient): The agents client, e.g. `project_client.agents`.
+    :param thread_id (str): The thread to run the agent on.
+    :param agent_id (str): The agent to run.
+    :return: The finished run; check `status` and `last_error` for failures.
+    :rtype: ThreadRun
+    :raises RuntimeError: If no run was created, or the run stopped without finishing.
+    """
+    run = None
+    with agents_client.runs.stream(thread_id=thread_id, agent_id=agent_id) as stream:
+        for event_type, event_data, _ in stream:
+            if isinstance(event_data, ThreadRun):
+                if run is None:
+                    print(f"Run ID: {event_data.id}")
+                run = event_data
+                print(f"Run status: {run.status}")
+            elif event_type == AgentStreamEvent.ERROR:
+                print(f"Stream error: {event_data}")
+
+    if run is None:
+        # The stream closed before reporting the run; look it up
+        run = next(iter(agents_client.runs.list(thread_id=thread_id, order=ListSortOrder.DESCENDING, limit=1)), None)
+        if run is None:
+            raise RuntimeError(f"No run was created on thread {thread_id}")
+
+    # The stream may also have closed before the run finished
+    delay = initial_delay
+    while run.status in _PENDING_RUN_STATUSES:
+        time.sleep(delay + random.uniform(0, delay * 0.1))
+        run = agents_client.runs.get(thread_id=thread_id, run_id=run.id)
+        print(f"Run status: {run.status}")
+        delay = min(delay * 1.5, max_delay)
+
+    if run.status not in TERMINAL_RUN_STATUSES:
+        # The example agents register no function tools, so requires_action cannot be answered
+        raise RuntimeError(f"Run {run.id} stopped with status {run.status}")
+    return run
@@ -0,0 +1,273 @@
+"""
+Offline agent evaluation through the Azure OpenAI Batch API.
+
+Instead of one synchronous LLM call per (row, evaluator), each evaluator first converts its
+inputs as usual and its `.prompty` template is rendered with them; all prompts are written
+into a single JSONL file and submitted as one batch job. `evaluate(...)` then runs the real
+evaluators with their LLM calls answered from the batch replies, so they parse the replies and
+are logged to the Foundry project as in a synchronous run. Batch jobs are billed at roughly
+half the price of synchronous calls and have a 24h completion window, though they usually
+finish in minutes. Only single-turn query/response rows are supported: an evaluator scoring a
+conversation makes one LLM call per turn, and only the first call of each row is captured.
+
+Used by evaluate-azure-ai-agent-qauality.py when EVALUATION_BATCH_MODE=true.
+"""
+
+import contextlib
+import functools
+import io
+import json
+import re
+import time
+import random
+
+import orjson
+import yaml
+from jinja2 import Template
+
+BATCH_ENDPOINT = "/chat/completions"
+TERMINAL_BATCH_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+_ROLE_PATTERN = re.compile(r"^\s*(system|user|assistant):\s*$", re.MULTILINE)
+_VARIABLE_PATTERN = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+_JINJA_SYNTAX = ("{{", "{%", "{#")
+
+
+@functools.lru_cache(maxsize=None)
+def compile_prompt_builder(source):
+    """
+    Compile a prompt template into a `build(inputs) -> str` function.
+
+    Templates that only substitute plain `{{ variable }}` placeholders are specialized into
+    generated Python that concatenates string literals and input values, skipping Jinja's
+    lexer, sandbox and filter dispatch on every row. Anything else (blocks, filters,
+    comments) falls back to rendering with Jinja. Builders are cached per template source.
+
+    :param source (str): The Jinja template source of one prompty message.
+    :return: A function rendering the template from a dict of inputs.
+    :rtype: Callable[[dict], str]
+    """
+    parts = _VARIABLE_PATTERN.split(source)
+    # parts = [literal, variable, literal, variable, ..., literal]
+    literals, variables = parts[0::2], parts[1::2]
+    if any(token in literal for literal in literals for token in _JINJA_SYNTAX):
+        template = Template(source)
+        return lambda inputs: template.render(**inputs)
+
+    # Like Jinja, values render with str() and undefined variables as an empty string
+    terms = []
+    for index, literal in enumerate(literals):
+        if literal:
+            terms.append(repr(literal))
+        if index < len(variables):
+            terms.append(f"str(inputs.get({variables[index]!r}, ''))")
+    code = compile(f"def build(inputs):\n    return {' + '.join(terms) or repr('')}\n", "<prompt-builder>", "exec")
+    namespace = {}
+    exec(code, namespace)
+    return namespace["build"]
+
+
+def load_prompty(path):
+    """
+    Split a `.prompty` file into its model parameters and (role, template) message pairs.
+
+    :param path (str): Path to the `.prompty` file.
+    :return: A tuple of the front matter `model.parameters` dict and a list of (role, prompt builder).
+    :rtype: tuple
+    """
+    with open(path, encoding="utf-8") as f:
+        _, front_matter, body = f.read().split("---", 2)
+
+    parameters = yaml.safe_load(front_matter).get("model", {}).get("parameters", {})
+    parts = _ROLE_PATTERN.split(body)
+    # parts = [preamble, role, content, role, content, ...]
+    messages = [(role, compile_prompt_builder(content.strip())) for role, content in zip(parts[1::2], parts[2::2])]
+    return parameters, messages
+
+
+class _PromptCaptured(Exception):
+    def __init__(self, inputs):
+        super().__init__("prompt inputs captured")
+        self.inputs = inputs
+
+
+@contextlib.contextmanager
+def _replaced_flow(evaluator, flow):
+    # Prompty-based evaluators send their one LLM call through `self._flow`
+    original = evaluator._flow
+    evaluator._flow = flow
+    try:
+        yield
+    finally:
+        evaluator._flow = original
+
+
+def capture_prompt_inputs(evaluator, row):
+    """
+    Run the evaluator's own input conversion on a row, stopping just before its LLM call.
+
+    :return: The inputs the evaluator would render its prompt with, or None when it finishes
+        without an LLM call (e.g. a "not applicable" result when there are no tool calls).
+    :rtype: Optional[dict]
+    """
+    async def capture(timeout=None, **inputs):
+        raise _PromptCaptured(inputs)
+
+    with _replaced_flow(evaluator, capture):
+        try:
+            evaluator(**row)
+        except _PromptCaptured as captured:
+            return captured.inputs
+    return None
+
+
+def _inputs_key(inputs):
+    # Identical prompt inputs render identical prompts, so they share one batch request
+    return json.dumps(inputs, sort_keys=True, default=str)
+
+
+def _replay_flow(replies):
+    async def replay(timeout=None, **inputs):
+        reply = replies.get(_inputs_key(inputs))
+        if reply is None:
+            # Only the first LLM call per row is captured, so later turns of a conversation have no reply
+            raise RuntimeError("No batch reply for this prompt; batch mode only supports single-turn query/response rows")
+        if isinstance(reply, Exception):
+            raise reply
+        return {
+            "llm_output": reply,
+            "input_token_count": 0,
+            "output_token_count": 0,
+            "total_token_count": 0,
+            "finish_reason": "",
+            "model_id": "",
+            "sample_input": "",
+            "sample_output": "",
+        }
+
+    return replay
+
+
+@contextlib.contextmanager
+def replaying_batch_replies(evaluators, replies):
+    """
+    Serve the evaluators' LLM calls from batch replies while the block runs, e.g. around `evaluate(...)`.
+
+    The evaluators still convert their inputs and parse the replies themselves, exactly as in a
+    synchronous run. A prompt without a batch reply raises instead of calling the model.
+
+    :param evaluators (Dict[str, Any]): The evaluators passed to `run_batch_evaluation`.
+    :param replies (Dict[str, dict]): The replies returned by `run_batch_evaluation`.
+    """
+    with contextlib.ExitStack() as stack:
+        for name, evaluator in evaluators.items():
+            stack.enter_context(_replaced_flow(evaluator, _replay_flow(replies[name])))
+        yield
+
+
+def _is_json_mode(parameters):
+    response_format = parameters.get("response_format") or {}
+    return isinstance(response_format, dict) and response_format.get("type") == "json_object"
+
+
+def build_batch_request(custom_id, deployment, prompt, inputs):
+    """
+    Render one evaluator prompt as a Batch API request line.
+
+    :param custom_id (str): Identifier the batch echoes back with the result.
+    :param deployment (str): The Global-Batch model deployment to send the request to.
+    :param prompt (tuple): `(parameters, messages)` as returned by `load_prompty`.
+    :param inputs (dict): The evaluator's prompt inputs, from `capture_prompt_inputs`.
+    :rtype: dict
+    """
+    parameters, messages = prompt
+    body = dict(parameters)
+    body["model"] = deployment
+    body["messages"] = [{"role": role, "content": build(inputs)} for role, build in messages]
+    return {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+
+
+def submit_batch(client, requests, initial_delay=5.0, max_delay=60.0):
+    """
+    Upload the request lines, create a batch job and wait for it to reach a terminal state.
+
+    :param client (openai.AzureOpenAI): The Azure OpenAI client.
+    :param requests (List[dict]): Request lines from `build_batch_request`.
+    :return: The parsed output lines of the batch.
+    :rtype: List[dict]
+    """
+    # orjson serializes straight to UTF-8 bytes, much faster than json.dumps for large batches
+    payload = b"".join(orjson.dumps(request) + b"\n" for request in requests)
+    batch_file = client.files.create(
+        file=("evaluation_batch_input.jsonl", io.BytesIO(payload)),
+        purpose="batch",
+    )
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h",
+    )
+    print(f"Submitted evaluation batch, ID: {batch.id}")
+
+    # Batch jobs take minutes, so back off exponentially up to a minute between status checks
+    delay = initial_delay
+    while batch.status not in TERMINAL_BATCH_STATUSES:
+        time.sleep(delay + random.uniform(0, delay * 0.1))
+        batch = client.batches.retrieve(batch.id)
+        print(f"Batch status: {batch.status}")
+        delay = min(delay * 2, max_delay)
+
+    if batch.status != "completed" or not batch.output_file_id:
+        raise RuntimeError(f"Evaluation batch {batch.id} ended with status {batch.status}: {batch.errors}")
+
+    output = client.files.content(batch.output_file_id).text
+    return [json.loads(line) for line in output.splitlines() if line.strip()]
+
+
+def run_batch_evaluation(client, deployment, rows, evaluators):
+    """
+    Send the LLM call of every row and evaluator through a single Azure OpenAI batch job.
+
+    Each evaluator converts its own inputs first; only its prompts are collected into the batch.
+    Pass the returned replies to `replaying_batch_replies` to score the rows with them.
+
+    :param evaluators (Dict[str, Any]): Prompty-based evaluators keyed by name.
+    :return: Per evaluator name, a dict mapping each prompt's inputs to the model reply or to
+        the Exception that prevented one.
+    :rtype: Dict[str, dict]
+    """
+    prompts = {name: load_prompty(evaluator._prompty_file) for name, evaluator in evaluators.items()}
+    replies = {name: {} for name in evaluators}
+
+    requests = []
+    request_keys = {}
+    for row in rows:
+        for name, evaluator in evaluators.items():
+            try:
+                inputs = capture_prompt_inputs(evaluator, row)
+            except Exception:
+                # evaluate() runs the evaluator on this row again and reports the error there
+                continue
+            if inputs is None:
+                continue
+            key = _inputs_key(inputs)
+            if key not in replies[name]:
+                replies[name][key] = RuntimeError("No result returned by the batch")
+                custom_id = str(len(requests))
+                request_keys[custom_id] = (name, key)
+                requests.append(build_batch_request(custom_id, deployment, prompts[name], inputs))
+
+    if not requests:
+        return replies
+
+    for line in submit_batch(client, requests):
+        name, key = request_keys[line["custom_id"]]
+        try:
+            if line.get("error"):
+                raise RuntimeError(line["error"])
+            content = line["response"]["body"]["choices"][0]["message"]["content"]
+            # Like the prompty runtime, hand JSON-mode replies to the evaluator already parsed
+            replies[name][key] = json.loads(content) if _is_json_mode(prompts[name][0]) else content
+        except Exception as e:
+            replies[name][key] = e
+    return replies
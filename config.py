@@ -0,0 +1,58 @@
+"""
+Environment configuration shared by the example scripts.
+
+Every variable is read from the environment exactly once (after `load_dotenv()`) into an
+immutable `Config`, and the ones a script needs are validated before any Azure client is built.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+# Config field -> environment variable, see .env-sample
+_ENV_VARS = {
+    "project_endpoint": "AZURE_AI_FOUNDRY_PROJECT_ENDPOINT",
+    "model_deployment": "AZURE_OPENAI_MODEL_DEPLOYMENT",
+    "chat_deployment": "AZURE_OPENAI_CHATGPT_DEPLOYMENT",
+    "openai_service": "AZURE_OPENAI_SERVICE",
+    "openai_api_key": "AZURE_OPENAI_API_KEY",
+    "batch_deployment": "AZURE_OPENAI_BATCH_DEPLOYMENT",
+}
+
+_ENDPOINT_FIELDS = ("project_endpoint", "openai_service")
+
+
+@dataclass(frozen=True)
+class Config:
+    __slots__ = tuple(_ENV_VARS) + ("batch_mode",)
+
+    project_endpoint: Optional[str]
+    model_deployment: Optional[str]
+    chat_deployment: Optional[str]
+    openai_service: Optional[str]
+    openai_api_key: Optional[str]
+    batch_deployment: Optional[str]
+    batch_mode: bool
+
+    @classmethod
+    def from_env(cls, *required: str) -> "Config":
+        """
+        Build the configuration from environment variables.
+
+        :param required (str): Names of the `Config` fields the calling script cannot run without.
+        :return: The loaded configuration.
+        :rtype: Config
+        :raises ValueError: If a required variable is unset or empty, or an endpoint is not https.
+        """
+        values = {field: os.getenv(name) or None for field, name in _ENV_VARS.items()}
+
+        missing = [_ENV_VARS[field] for field in required if not values[field]]
+        if missing:
+            raise ValueError(f"Missing required environment variables (see .env-sample): {', '.join(missing)}")
+
+        for field in _ENDPOINT_FIELDS:
+            if values[field] and not values[field].startswith("https://"):
+                raise ValueError(f"{_ENV_VARS[field]} must be an https:// URL, got {values[field]!r}")
+
+        batch_mode = os.getenv("EVALUATION_BATCH_MODE", "false").lower() == "true"
+        return cls(batch_mode=batch_mode, **values)
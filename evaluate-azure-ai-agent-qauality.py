@@ -2,42 +2,43 @@
 
 import os
 import json
-import time
 from pprint import pprint
 from dotenv import load_dotenv
 
 from azure.identity import DefaultAzureCredential
-from azure.ai.agents import AgentsClient
 from azure.ai.projects import AIProjectClient
 from azure.ai.agents.models import ListSortOrder
-from azure.ai.evaluation import (
-    AIAgentConverter,
-    ToolCallAccuracyEvaluator,
-    AzureOpenAIModelConfiguration,
-    IntentResolutionEvaluator,
-    TaskAdherenceEvaluator,
-    evaluate,
-)
 # Import your custom functions to be used as Tools for the Agent
 from user_functions import user_functions
+from agent_runs import stream_run
+from http_transport import create_transport
+from config import Config
 
 # Load environment variables
 load_dotenv()
+config = Config.from_env(
+    "project_endpoint", "model_deployment", "chat_deployment", "openai_service", "openai_api_key"
+)
 
 # Initialize Azure AI clients
-endpoint = os.getenv("AZURE_AI_FOUNDRY_PROJECT_ENDPOINT")
-credential = DefaultAzureCredential()
+# Skip credential sources that are never used here to avoid probing them on the first token request
+credential = DefaultAzureCredential(
+    exclude_interactive_browser_credential=True,
+    exclude_visual_studio_code_credential=True,
+)
 
-agent_client = AgentsClient(endpoint=endpoint, credential=credential)
+# One project client (and token cache); the agents client is derived from it
 project_client = AIProjectClient(
     credential=credential,
-    endpoint=endpoint,
-    api_version="2025-05-15-preview"
+    endpoint=config.project_endpoint,
+    api_version="2025-05-15-preview",
+    transport=create_transport(),
 )
+agent_client = project_client.agents
 
 # Create Agent
 agent = agent_client.create_agent(
-    model=os.environ["AZURE_OPENAI_MODEL_DEPLOYMENT"],
+    model=config.model_deployment,
     name="city-travel-agent",
     instructions="You are helpful agent"
 )
@@ -55,61 +56,95 @@ message = agent_client.messages.create(
 )
 print(f"Created message, ID: {message.id}")
 
-# Run the agent
-run = agent_client.runs.create(thread_id=thread.id, agent_id=agent.id)
-print(f"Run ID: {run.id}")
-
-# Poll the run status
-while run.status in ["queued", "in_progress", "requires_action"]:
-    time.sleep(1)
-    run = agent_client.runs.get(thread_id=thread.id, run_id=run.id)
-    print(f"Run status: {run.status}")
-
+# Run the agent, streaming run events over SSE instead of polling for status
+run = stream_run(agent_client, thread.id, agent.id)
 if run.status == "failed":
     print(f"Run error: {run.last_error}")
 
 # List messages in the thread
 messages = agent_client.messages.list(thread_id=thread.id, order=ListSortOrder.ASCENDING)
-for msg in messages:
-    if msg.text_messages:
-        last_text = msg.text_messages[-1]
-        print(f"{msg.role}: {last_text.text.value}")
-
-# Prepare evaluation data
-converter = AIAgentConverter(project_client)
-filename = os.path.join(os.getcwd(), "evaluation_input_data.jsonl")
-evaluation_data = converter.prepare_evaluation_data(thread_ids=thread.id, filename=filename)
-
-with open(filename, "w", encoding='utf-8') as f:
-    for obj in evaluation_data:
-        f.write(json.dumps(obj, ensure_ascii=False) + '\n')
-print(f"Evaluation data saved to {filename}")
-
-# Model configuration for evaluation
-model_config = AzureOpenAIModelConfiguration(
-    azure_endpoint=os.environ["AZURE_OPENAI_SERVICE"],
-    api_key=os.environ["AZURE_OPENAI_API_KEY"],
-    api_version="2025-01-01-preview",
-    azure_deployment=os.environ["AZURE_OPENAI_CHATGPT_DEPLOYMENT"],
-)
-
-# Initialize evaluators
-intent_resolution = IntentResolutionEvaluator(model_config=model_config)
-tool_call_accuracy = ToolCallAccuracyEvaluator(model_config=model_config)
-task_adherence = TaskAdherenceEvaluator(model_config=model_config)
-
-used_evaluators = {
-    "tool_call_accuracy": tool_call_accuracy,
-    "intent_resolution": intent_resolution,
-    "task_adherence": task_adherence,
-}
-
-# Run evaluation
-response = evaluate(
-    data=filename,
-    evaluators=used_evaluators,
-    azure_ai_project=os.environ.get("AZURE_AI_FOUNDRY_PROJECT_ENDPOINT")
-)
+# Project each message once, then print the whole conversation in a single write
+rows = [(msg.role, msg.text_messages[-1].text.value) for msg in messages if msg.text_messages]
+print("\n".join(f"{role}: {text}" for role, text in rows))
+
+
+def _load_rows(data):
+    with open(data, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate_in_batch(data, evaluators, model_config):
+    """
+    Evaluate all rows with one Azure OpenAI Batch API job instead of per-row LLM calls.
+
+    `evaluate(...)` then scores the rows with the batch replies standing in for the evaluators'
+    LLM calls, so the results are logged to the Foundry project just like a synchronous run.
+    """
+    from azure.ai.evaluation import evaluate
+    from openai import AzureOpenAI
+    from batch_evaluation import replaying_batch_replies, run_batch_evaluation
+
+    client = AzureOpenAI(
+        azure_endpoint=model_config["azure_endpoint"],
+        api_key=model_config["api_key"],
+        api_version=model_config["api_version"],
+    )
+    deployment = config.batch_deployment or model_config["azure_deployment"]
+    replies = run_batch_evaluation(client, deployment, _load_rows(data), evaluators)
+    with replaying_batch_replies(evaluators, replies):
+        return evaluate(data=data, evaluators=evaluators, azure_ai_project=config.project_endpoint)
+
+
+def _run_evaluation(thread_id):
+    """
+    Convert the thread to evaluation data and score it with the evaluators.
+
+    azure.ai.evaluation pulls in promptflow, jinja2 and the evaluator configs, so it is only
+    imported here, once the agent run has finished.
+    """
+    from azure.ai.evaluation import (
+        evaluate,
+        AIAgentConverter,
+        ToolCallAccuracyEvaluator,
+        AzureOpenAIModelConfiguration,
+        IntentResolutionEvaluator,
+        TaskAdherenceEvaluator,
+    )
+
+    # Prepare evaluation data
+    converter = AIAgentConverter(project_client)
+    filename = os.path.join(os.getcwd(), "evaluation_input_data.jsonl")
+    # The converter writes the JSONL file itself; escaped non-ASCII characters parse back identically
+    converter.prepare_evaluation_data(thread_ids=thread_id, filename=filename)
+    print(f"Evaluation data saved to {filename}")
+
+    # Model configuration for evaluation
+    model_config = AzureOpenAIModelConfiguration(
+        azure_endpoint=config.openai_service,
+        api_key=config.openai_api_key,
+        api_version="2025-01-01-preview",
+        azure_deployment=config.chat_deployment,
+    )
+
+    # Initialize evaluators
+    intent_resolution = IntentResolutionEvaluator(model_config=model_config)
+    tool_call_accuracy = ToolCallAccuracyEvaluator(model_config=model_config)
+    task_adherence = TaskAdherenceEvaluator(model_config=model_config)
+
+    used_evaluators = {
+        "tool_call_accuracy": tool_call_accuracy,
+        "intent_resolution": intent_resolution,
+        "task_adherence": task_adherence,
+    }
+
+    # Run evaluation
+    if config.batch_mode:
+        return evaluate_in_batch(data=filename, evaluators=used_evaluators, model_config=model_config)
+    # evaluate() already runs the rows, and each row's evaluators, in parallel
+    return evaluate(data=filename, evaluators=used_evaluators, azure_ai_project=config.project_endpoint)
+
+
+response = _run_evaluation(thread.id)
 
 # Clean up agent
 agent_client.delete_agent(agent.id)
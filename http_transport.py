@@ -0,0 +1,43 @@
+"""
+Shared HTTP transport for the Azure SDK clients used by the examples.
+
+A default `RequestsTransport` already keeps a pooled keep-alive session, but each transport
+has its own. The examples build an `AIProjectClient` and derive the agents client from it,
+and both go to the same Foundry host. Handing them one `requests.Session` lets them share a
+single connection pool, so the TLS connection opened by one is reused by the other.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from azure.core.pipeline.transport import RequestsTransport
+
+_session = None
+
+
+def create_transport(pool_connections: int = 10, pool_maxsize: int = 20) -> RequestsTransport:
+    """
+    Create an Azure SDK transport backed by a process-wide `requests.Session`.
+
+    The session is set up like the one `RequestsTransport` builds for itself, since azure-core
+    skips that setup for a session it is given: proxy and certificate settings come from the
+    environment, and urllib3 retries are disabled so the SDK retry policy is the only one.
+
+    :param pool_connections (int): Number of hosts to keep a connection pool for.
+    :param pool_maxsize (int): Maximum number of connections kept alive per host.
+    :return: A transport to pass as `transport=` to Azure SDK clients.
+    :rtype: RequestsTransport
+    """
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        _session.trust_env = True
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=Retry(total=False, redirect=False, raise_on_status=False),
+        )
+        for protocol in ("http://", "https://"):
+            _session.mount(protocol, adapter)
+    # The session is shared between clients, so no single transport may close it
+    return RequestsTransport(session=_session, session_owner=False)
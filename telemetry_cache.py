@@ -0,0 +1,58 @@
+"""
+On-disk cache for the Application Insights connection string of an Azure AI Foundry project.
+
+`ai_project.telemetry.get_connection_string()` is a network round-trip that returns the same
+value for a given project, so the tracing examples cache it in
+`~/.cache/foundry_appinsights.json`, keyed by a hash of the project endpoint, for a week.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "foundry_appinsights.json")
+CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+def _cache_key(endpoint: str) -> str:
+    return hashlib.sha256(endpoint.encode("utf-8")).hexdigest()[:16]
+
+
+def _read_cache() -> dict:
+    try:
+        with open(CACHE_PATH, encoding="utf-8") as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def get_cached_connection_string(ai_project, endpoint: str) -> str:
+    """
+    Get the project's Application Insights connection string, using the local cache when fresh.
+
+    :param ai_project (AIProjectClient): The client used to fetch the connection string on a cache miss.
+    :param endpoint (str): The Azure AI Foundry project endpoint the cache entry is keyed by.
+    :return: The connection string, or an empty value if Application Insights is not enabled.
+    :rtype: str
+    """
+    key = _cache_key(endpoint)
+    cache = _read_cache()
+    entry = cache.get(key)
+    if isinstance(entry, dict) and entry.get("conn") and time.time() - entry.get("ts", 0) < CACHE_TTL_SECONDS:
+        return entry["conn"]
+
+    connection_string = ai_project.telemetry.get_connection_string()
+    if connection_string:
+        # Caching is best-effort; a read-only or missing home directory just means no cache
+        cache[key] = {"conn": connection_string, "ts": time.time()}
+        try:
+            os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+            # The connection string carries the instrumentation key, so keep the file private
+            fd = os.open(CACHE_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with open(fd, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+        except OSError:
+            pass
+    return connection_string
@@ -6,8 +6,8 @@ Key functionalities:
 - Checks and configures Application Insights for telemetry.
 - Creates a financial education agent with specific instructions and disclaimers.
 - Creates a new conversation thread and sends a user message about mortgage types in Switzerland.
-- Initiates a run for the agent to process the message and polls for completion.
-- Lists all threads and messages associated with the agent, printing out the conversation.
+- Initiates a run for the agent to process the message and streams its events until completion.
+- Lists all threads associated with the agent and prints the agent's final reply.
 - Cleans up by deleting the created agent.
 Requirements:
 - Azure SDK for Python (`azure-ai-agents`, `azure-ai-projects`, `azure-identity`, `azure-monitor-opentelemetry`)
@@ -21,15 +21,19 @@ Note:
 - The agent provides only general financial advice and always includes disclaimers.
 '''
 
-import os, time
-import asyncio
+import os
 from azure.ai.projects import AIProjectClient
 from azure.identity import DefaultAzureCredential
 from azure.monitor.opentelemetry import configure_azure_monitor
 from opentelemetry import trace
 from azure.ai.agents.models import ListSortOrder
 from dotenv import load_dotenv
+from telemetry_cache import get_cached_connection_string
+from agent_runs import stream_run
+from http_transport import create_transport
+from config import Config
 load_dotenv()
+config = Config.from_env("project_endpoint")
 tracer = trace.get_tracer(__name__)
 
 os.environ["AZURE_TRACING_GEN_AI_CONTENT_RECORDING_ENABLED"] = "true"
@@ -37,11 +41,14 @@ os.environ["AZURE_TRACING_GEN_AI_CONTENT_RECORDING_ENABLED"] = "true"
 # Initialize the AIProjectClient with Azure credentials and project endpoint
 ai_project = AIProjectClient(
     credential=DefaultAzureCredential(),
-    endpoint=os.getenv("AZURE_AI_FOUNDRY_PROJECT_ENDPOINT"),
-    api_version = "2025-05-15-preview" 
+    endpoint=config.project_endpoint,
+    api_version = "2025-05-15-preview",
+    # Share one keep-alive connection pool with the agents client derived from this one
+    transport=create_transport(),
 )
 
-connection_string = ai_project.telemetry.get_connection_string()
+# Cached on disk per project endpoint for a week to skip the lookup on every start
+connection_string = get_cached_connection_string(ai_project, config.project_endpoint)
 
 
 
@@ -49,6 +56,12 @@ if not connection_string:
     print("Application Insights is not enabled. Enable by going to Tracing in your Azure AI Foundry project.")
     exit()
 
+# Coalesce spans for 15s instead of the SDK default 5s so chatty runs export fewer, fuller
+# batches, with a larger queue so spans are not dropped while waiting. Spans still pending
+# are flushed at exit. The BatchSpanProcessor created by configure_azure_monitor reads these.
+os.environ.setdefault("OTEL_BSP_SCHEDULE_DELAY", "15000")
+os.environ.setdefault("OTEL_BSP_MAX_QUEUE_SIZE", "8192")
+
 # Configure OpenTelemetry to use Azure Monitor for telemetry collection
 configure_azure_monitor(connection_string=connection_string) #enable telemetry collection
 
@@ -90,15 +103,9 @@ with tracer.start_as_current_span("financial-education-agent-tracing"):
     print(f"Created message, message ID: {message.id}")
 
     # [START create_run]
-    run = agents_client.runs.create(thread_id=thread.id, agent_id=agent.id)
-
-    # Poll the run as long as run status is queued or in progress
-    while run.status in ["queued", "in_progress", "requires_action"]:
-        # Wait for a second
-        time.sleep(1)
-        run = agents_client.runs.get(thread_id=thread.id, run_id=run.id)
-        # [END create_run]
-        print(f"Run status: {run.status}")
+    # Stream run events over SSE so control returns as soon as the status changes, instead of polling
+    run = stream_run(agents_client, thread.id, agent.id)
+    # [END create_run]
 
     if run.status == "failed":
         print(f"Run error: {run.last_error}")
@@ -107,9 +114,9 @@ with tracer.start_as_current_span("financial-education-agent-tracing"):
     print("Deleted agent")
 
     # [START list_messages]
-    messages = agents_client.messages.list(thread_id=thread.id, order=ListSortOrder.ASCENDING)
-    for msg in messages:
-        if msg.text_messages:
-            last_text = msg.text_messages[-1]
-            print(f"{msg.role}: {last_text.text.value}")
+    # Only the agent's final reply is printed, so fetch just the newest message
+    messages = agents_client.messages.list(thread_id=thread.id, order=ListSortOrder.DESCENDING, limit=1)
+    last_msg = next(iter(messages), None)
+    if last_msg and last_msg.text_messages:
+        print(f"{last_msg.role}: {last_msg.text_messages[-1].text.value}")
     # [END list_messages]
\ No newline at end of file
@@ -16,8 +16,8 @@ Key Components:
 Workflow:
 ---------
 1. Loads environment variables and configures Azure tracing.
-2. Initializes Azure AIProjectClient and retrieves the Application Insights connection string.
-3. Configures OpenTelemetry to export traces to Azure Monitor.
+2. On first use from main(), initializes Azure AIProjectClient and retrieves the Application Insights connection string.
+3. Configures OpenTelemetry to export traces to Azure Monitor (once per process).
 4. Defines a LangGraph state and builds a conversational agent graph:
     - The agent can answer questions and use a search tool.
     - All interactions are traced and logged.
@@ -31,8 +31,12 @@ Usage:
 
 Main Functions:
 ---------------
-- setup_graph(): Builds and compiles the LangGraph agent with tools and model.
-- test_agent(graph, question): Runs the agent on a question, printing responses and tracing events.
+- get_config(): Loads and validates the environment configuration once.
+- get_project() / get_model(): Lazily create and cache the AIProjectClient and Azure OpenAI model.
+- configure_telemetry(): Configures Azure Monitor exporting, at most once per process.
+- setup_graph(): Builds and compiles the LangGraph agent with tools and model (once, then cached).
+- test_agent(graph, question): Asynchronously streams the agent's answer to a question, printing responses and tracing events.
+- run_test_questions(graph, questions): Runs several test questions concurrently.
 - main(): Initializes the agent and runs test questions.
 
 Dependencies:
@@ -49,7 +53,7 @@ Dependencies:
 
 """
 
-import os, time
+import os, time, json
 import asyncio
 from azure.ai.projects import AIProjectClient
 from azure.identity import DefaultAzureCredential
@@ -59,51 +63,82 @@ from azure.ai.agents.models import ListSortOrder
 from opentelemetry.trace import SpanKind
 import os
 from dotenv import load_dotenv
+from telemetry_cache import get_cached_connection_string
+from config import Config
+from functools import lru_cache
 from typing import Annotated
 from typing_extensions import TypedDict
-from langgraph.graph import StateGraph, START, END
-from langgraph.graph.message import add_messages
-from langchain_openai import AzureChatOpenAI
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langgraph.prebuilt import ToolNode, tools_condition
 tracer = trace.get_tracer(__name__)
 load_dotenv()
 
 os.environ["AZURE_TRACING_GEN_AI_CONTENT_RECORDING_ENABLED"] = "true"
 
-# Initialize the AIProjectClient with Azure credentials and project endpoint
-ai_project = AIProjectClient(
-    credential=DefaultAzureCredential(),
-    endpoint=os.getenv("AZURE_AI_FOUNDRY_PROJECT_ENDPOINT"),
-    api_version = "2025-05-15-preview" 
-)
-
-connection_string = ai_project.telemetry.get_connection_string()
-
-
-
-if not connection_string:
-    print("Application Insights is not enabled. Enable by going to Tracing in your Azure AI Foundry project.")
-    exit()
-
-# Configure OpenTelemetry to use Azure Monitor for telemetry collection
-configure_azure_monitor(connection_string=connection_string) #enable telemetry collection
-
-span = trace.get_current_span()
-
-
-# Define the state structure for our LangGraph Agent
-class State(TypedDict):
-    messages: Annotated[list, add_messages]
+# Azure clients and telemetry are set up lazily from main(), so importing this module stays cheap
+_telemetry_configured = False
+
+
+@lru_cache(maxsize=1)
+def get_config():
+    return Config.from_env("project_endpoint", "chat_deployment", "openai_service")
+
+
+@lru_cache(maxsize=1)
+def get_project():
+    # Initialize the AIProjectClient with Azure credentials and project endpoint
+    return AIProjectClient(
+        credential=DefaultAzureCredential(),
+        endpoint=get_config().project_endpoint,
+        api_version = "2025-05-15-preview" 
+    )
+
+
+def configure_telemetry():
+    global _telemetry_configured
+    # Re-running configure_azure_monitor (e.g. in a notebook) would register duplicate exporters
+    if _telemetry_configured:
+        return True
+
+    # Cached on disk per project endpoint for a week to skip the lookup on every start
+    connection_string = get_cached_connection_string(get_project(), get_config().project_endpoint)
+    if not connection_string:
+        print("Application Insights is not enabled. Enable by going to Tracing in your Azure AI Foundry project.")
+        return False
+
+    # Coalesce spans for 15s instead of the SDK default 5s so chatty runs export fewer, fuller
+    # batches, with a larger queue so spans are not dropped while waiting. Spans still pending
+    # are flushed at exit. The BatchSpanProcessor created by configure_azure_monitor reads these.
+    os.environ.setdefault("OTEL_BSP_SCHEDULE_DELAY", "15000")
+    os.environ.setdefault("OTEL_BSP_MAX_QUEUE_SIZE", "8192")
+
+    # Configure OpenTelemetry to use Azure Monitor for telemetry collection
+    configure_azure_monitor(connection_string=connection_string) #enable telemetry collection
+    _telemetry_configured = True
+    return True
+
+@lru_cache(maxsize=1)
+def get_model():
+    from langchain_openai import AzureChatOpenAI
+
+    return AzureChatOpenAI(
+        azure_deployment=get_config().chat_deployment,
+        api_version="2024-12-01-preview",
+        temperature=0.3,
+        azure_endpoint=get_config().openai_service
+    )
+
+# The graph only depends on the (cached) model and tools, so it is compiled once per process
+@lru_cache(maxsize=1)
+def setup_graph():
+    # LangGraph and LangChain drag in hundreds of modules, so they are imported on first use
+    from langgraph.graph import StateGraph, START, END
+    from langgraph.graph.message import add_messages
+    from langgraph.prebuilt import ToolNode, tools_condition
+    from langchain_community.tools.tavily_search import TavilySearchResults
 
-model = AzureChatOpenAI(
-    azure_deployment=os.getenv("AZURE_OPENAI_CHATGPT_DEPLOYMENT"),
-    api_version="2024-12-01-preview",
-    temperature=0.3,
-    azure_endpoint=os.getenv("AZURE_OPENAI_SERVICE")
-)
+    # Define the state structure for our LangGraph Agent
+    class State(TypedDict):
+        messages: Annotated[list, add_messages]
 
-def setup_graph():
     # Initialize our state graph
     graph_builder = StateGraph(State)
 
@@ -112,14 +147,15 @@ def setup_graph():
     tools = [tool]
 
     # Set up the AI model
-    llm = model
+    llm = get_model()
   
     # Connect the tools to our AI model
     llm_with_tools = llm.bind_tools(tools)
 
     # Define the chatbot node function
-    def chatbot(state: State):
-        return {"messages": [llm_with_tools.invoke(state["messages"])]}
+    # Async node, so concurrent questions do not block the event loop on their LLM calls
+    async def chatbot(state: State):
+        return {"messages": [await llm_with_tools.ainvoke(state["messages"])]}
 
     # Build the graph structure
     graph_builder.add_node("chatbot", chatbot)
@@ -130,42 +166,64 @@ def setup_graph():
 
     return graph_builder.compile()
 
-def test_agent(graph, question: str):
+async def test_agent(graph, question: str):
     with tracer.start_as_current_span("langgraph_movie_agent") as span:
         print("\n" + "="*50)
         print(f"😀 User: {question}")
         span.set_attribute("user_input", question)
         print("="*50)
 
+        # Only the final response survives on the span, so record attributes once after streaming
+        last_content = None
+        search_queries = []
         try:
-            for event in graph.stream({"messages": [("human", question)]}):
+            async for event in graph.astream({"messages": [("human", question)]}):
                 for value in event.values():
                     if "messages" in value:
                         message = value["messages"][-1]
                         if hasattr(message, "content"):
                             print("\n🤖 AI:", message.content)
-                            span.set_attribute("agent_response", message.content)
+                            last_content = message.content
                         if hasattr(message, "tool_calls") and message.tool_calls:
                             print("\n🔍 Searching...")
                             for tool_call in message.tool_calls:
-                                print(f"- Search query: {tool_call['args'].get('query', '')}")
-                                span.set_attribute("search_tool_call_query", f"- Search query: {tool_call['args'].get('query', '')}")
+                                query = tool_call['args'].get('query', '')
+                                print(f"- Search query: {query}")
+                                search_queries.append(query)
         except Exception as e:
             print(f"\n❌ Error occurred: {str(e)}")
 
+        if last_content is not None:
+            span.set_attribute("agent_response", last_content)
+        if search_queries:
+            span.set_attribute("search_tool_call_queries", json.dumps(search_queries))
+
+
+async def run_test_questions(graph, questions, max_concurrency=10):
+    # The model and search calls are network-bound, so questions are run concurrently
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(question):
+        async with semaphore:
+            await test_agent(graph, question)
+            print("\n" + "-"*50)
+
+    await asyncio.gather(*[run_one(question) for question in questions])
+
 
 def main():
     test_questions = [
         "What are three popular movies in Switzerland right now?"
     ]
 
+    if not configure_telemetry():
+        exit()
+
     print("🔄 Initializing agent...")
     graph = setup_graph()
     print("✅ Agent ready!\n")
 
-    for question in test_questions:
-        test_agent(graph, question)
-        print("\n" + "-"*50)
+    asyncio.run(run_test_questions(graph, test_questions))
 
 # Run the main function
 if __name__ == "__main__":